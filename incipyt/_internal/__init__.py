@@ -0,0 +1 @@
+"""Internal helpers for incipyt, not part of the public API."""
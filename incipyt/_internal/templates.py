@@ -0,0 +1,487 @@
+"""Template values and containers used to build tool configurations.
+
+Configuration values are stored as lazy templates -- callables taking an
+:class:`incipyt.system.Environment` -- and rendered only when the project
+structure is committed to disk.
+"""
+
+import functools
+import logging
+import operator
+import re
+from string import Formatter
+
+import click
+
+from incipyt._internal import utils
+
+logger = logging.getLogger(__name__)
+
+# Replacement fields of the `str.format` grammar: a name, an optional
+# conversion and an optional format spec. The lookbehind skips `{{` escapes.
+_FIELD_RE = re.compile(r"(?<!\{)\{([^{}!:]+)(?:![rsa])?(?::[^{}]*)?\}")
+
+# Templates that are exactly one bare field, like "{PROJECT_NAME}".
+_SINGLE_FIELD_RE = re.compile(r"\{(\w+)\}")
+
+
+def _iter_fields(template):
+    """Iterate over the replacement field names of `template`.
+
+    The regex scan cannot tell a field apart from an adjacent `{{`/`}}`
+    escape (e.g. the field of `"{{{NAME}}}"`), so templates containing an
+    escape go through the full `str.Formatter` grammar instead.
+    """
+    if "{{" in template or "}}" in template:
+        return (
+            name
+            for _, name, _, _ in Formatter().parse(template)
+            if name is not None
+        )
+    return (match.group(1) for match in _FIELD_RE.finditer(template))
+
+
+def _compile_template(template):
+    """Build a specialized render callable for `template`, if possible.
+
+    Templates made of literals and bare `{NAME}` fields -- the common case
+    -- are split once into alternating literal and field segments, so that
+    rendering is a single `str.join` instead of a full `str.format` pass.
+    Templates using escapes, conversions or format specs give `None`.
+    """
+    if "{{" in template or "}}" in template:
+        return None
+    if any(
+        match.group(0) != f"{{{match.group(1)}}}"
+        for match in _FIELD_RE.finditer(template)
+    ):
+        return None
+
+    segments = _FIELD_RE.split(template)
+    literals = segments[0::2]
+    fields = segments[1::2]
+    if not fields:
+        return lambda context: template
+
+    def render(context):
+        parts = []
+        for literal, field in zip(literals, fields):
+            parts.append(literal)
+            parts.append(format(context[field], ""))
+        parts.append(literals[-1])
+        return "".join(parts)
+
+    return render
+
+
+@functools.lru_cache(maxsize=None)
+def _extract_keys(template):
+    """Give the set of field names of `template`, parsing it only once.
+
+    Templates are short literal strings reused across many renders, so the
+    parse results are memoized for the whole interpreter lifetime.
+    """
+    return frozenset(_iter_fields(template))
+
+
+class Requires:
+    """Lazy string template rendered against an environment.
+
+    Field names of the template are looked up in the environment when the
+    instance is called, `kwargs` providing default values for them.
+    """
+
+    def __init__(self, template, confirmed=False, sanitizer=None, **kwargs):
+        """Build a lazy template for `template`.
+
+        :param template: Template string with `{VARIABLE}` fields.
+        :param confirmed: Mark pushed default values as confirmed.
+        :param sanitizer: Callable `(key, value)` applied to pulled values.
+        :param kwargs: Default values for the template fields.
+        """
+        self._template = template
+        self._confirmed = confirmed
+        self._sanitizer = sanitizer
+        self._kwargs = kwargs
+        self._fields = tuple(_iter_fields(template))
+        self._render = _compile_template(template)
+        single = _SINGLE_FIELD_RE.fullmatch(template)
+        self._single = single.group(1) if single else None
+        try:
+            self._hash = hash(
+                (template, confirmed, sanitizer, tuple(sorted(kwargs.items())))
+            )
+        except TypeError:
+            # Unhashable kwargs values; equal instances still hash equal.
+            self._hash = hash((template, confirmed))
+
+    _EQ_ATTRS = operator.attrgetter(
+        "_template", "_confirmed", "_sanitizer", "_kwargs"
+    )
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        try:
+            return self._EQ_ATTRS(self) == self._EQ_ATTRS(other)
+        except AttributeError:
+            return False
+
+    def __hash__(self):
+        return self._hash
+
+    _REPR_ATTRS = operator.attrgetter(
+        "_template", "_confirmed", "_sanitizer", "_kwargs"
+    )
+
+    def __repr__(self):
+        template, confirmed, sanitizer, kwargs = self._REPR_ATTRS(self)
+        return (
+            f"{type(self).__name__}(_template={template!r}, "
+            f"_confirmed={confirmed!r}, _sanitizer={sanitizer!r}, "
+            f"_kwargs={kwargs!r})"
+        )
+
+    def __call__(self, environment):
+        """Render the template against `environment`."""
+        context = RenderContext(
+            environment, sanitizer=self._sanitizer, confirmed=self._confirmed
+        )
+        for key in self._fields:
+            if key in self._kwargs:
+                value = self._kwargs[key]
+                if environment.get(key) != value:
+                    environment[key] = utils.EnvValue(
+                        value, confirmed=self._confirmed
+                    )
+        if self._single is not None:
+            return format(context[self._single], "")
+        if self._render is not None:
+            return self._render(context)
+        return context.render_string(self._template)
+
+
+class MultipleValues:
+    """Hold multiple conflicting values for a single configuration key."""
+
+    def __init__(self, head, tail):
+        """Chain `head` in front of `tail`, which can be a `MultipleValues`.
+
+        When `tail` is already a `MultipleValues` its value list is reused
+        in-place, keeping repeated conflicts on a single key linear instead
+        of quadratic. The caller must own `tail` and discard it; holders of
+        a wrapper that may be chained later copy it first (see `_copy`).
+        """
+        if isinstance(tail, MultipleValues):
+            tail._values.insert(0, head)
+            self._values = tail._values
+        else:
+            self._values = [head, tail]
+
+    def _copy(self):
+        """Give an independent wrapper over a copy of the value list."""
+        copy = MultipleValues.__new__(MultipleValues)
+        copy._values = self._values.copy()
+        return copy
+
+    _EQ_ATTRS = operator.attrgetter("_values")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        try:
+            return self._EQ_ATTRS(self) == self._EQ_ATTRS(other)
+        except AttributeError:
+            return False
+
+    _REPR_ATTRS = operator.attrgetter("_values")
+
+    def __repr__(self):
+        return f"{type(self).__name__}(_values={self._REPR_ATTRS(self)!r})"
+
+    def __call__(self, environment):
+        """Ask the user to choose between the rendered candidate values."""
+        return click.prompt(
+            "Conflicting configuration, choose between",
+            type=click.Choice(
+                [
+                    value(environment) if callable(value) else value
+                    for value in self._values
+                ]
+            ),
+        )
+
+
+class RenderContext:
+    """Mapping proxy exposing an environment to `str.format`."""
+
+    def __init__(self, environment, sanitizer=None, confirmed=False):
+        """Wrap `environment` for template rendering.
+
+        :param sanitizer: Callable `(key, value)` applied to pulled values.
+        :param confirmed: Mark values pushed during rendering as confirmed.
+        """
+        self.data = environment
+        self._sanitizer = sanitizer
+        self._confirmed = confirmed
+        self._keys = set()
+
+    def __getitem__(self, key):
+        value = self.data[key]
+        return self._sanitizer(key, value) if self._sanitizer else value
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        """Give the field names of the template being rendered."""
+        return self._keys
+
+    def values(self):
+        """Iterate over the environment values for the template fields."""
+        return (self[key] for key in self._keys)
+
+    def items(self):
+        """Iterate over the `(field, value)` pairs for the template fields."""
+        return ((key, self[key]) for key in self._keys)
+
+    def render_string(self, template, **kwargs):
+        """Render `template` against the environment.
+
+        :param kwargs: Default values pushed for the template fields.
+        """
+        self._keys = _extract_keys(template)
+        for key in self._keys:
+            if key in kwargs:
+                value = kwargs[key]
+                if self.data.get(key) != value:
+                    self.data[key] = utils.EnvValue(
+                        value, confirmed=self._confirmed
+                    )
+        for key in self._keys:
+            self.data[key]  # noqa: B018 -- pulling prompts missing values
+        return template.format_map(self)
+
+
+class TemplateDict(dict):
+    """Dict that templates values on assignment.
+
+    String values are wrapped in :class:`Requires`, nested mappings are
+    flattened key by key, sequences are appended without duplicates and
+    conflicting scalar values are collected in :class:`MultipleValues`.
+    """
+
+    def __init__(self, mapping):
+        """Initialize from the content of `mapping`."""
+        super().__init__(mapping)
+        # Sidecar sets of hashable list elements, keyed by key path and
+        # validated against the current list object, giving O(1) duplicate
+        # checks on append instead of a full list scan.
+        self._seen = {}
+
+    def _seen_values(self, keys, values):
+        """Give the sidecar set of hashable elements of the list at `keys`.
+
+        The set is rebuilt whenever the list at the path changed identity,
+        so a deleted or replaced list never inherits a stale set.
+        """
+        entry = self._seen.get(keys)
+        if entry is not None and entry[0] is values:
+            return entry[1]
+        seen = set()
+        for value in values:
+            try:
+                seen.add(value)
+            except TypeError:
+                pass
+        self._seen[keys] = (values, seen)
+        return seen
+
+    @staticmethod
+    def _get_transform(value):
+        """Wrap a leaf `value` into its lazy template form."""
+        if isinstance(value, str):
+            return Requires(value)
+        return value
+
+    @staticmethod
+    def _flatten(mapping, prefix):
+        """Yield `(keys, leaf)` pairs for all non-mapping leaves of `mapping`.
+
+        The walk is iterative, so arbitrarily nested mappings are expanded
+        in a single pass without re-entering `__setitem__` per level.
+        Children are pushed in reverse so leaves come out in source order,
+        which is user-visible in the generated configuration files.
+        """
+        stack = [
+            (prefix + (key,), value)
+            for key, value in reversed(list(mapping.items()))
+        ]
+        while stack:
+            keys, value = stack.pop()
+            if utils._is_dict(value):
+                stack.extend(
+                    (keys + (key,), val)
+                    for key, val in reversed(list(value.items()))
+                )
+            else:
+                yield keys, value
+
+    def __setitem__(self, keys, value):
+        if not utils.is_nonstring_sequence(keys):
+            keys = (keys,)
+        else:
+            keys = tuple(keys)
+
+        if utils._is_dict(value):
+            for leaf_keys, leaf in self._flatten(value, keys):
+                self._set_leaf(leaf_keys, leaf)
+            return
+
+        self._set_leaf(keys, value)
+
+    def _set_leaf(self, keys, value):
+        """Write a single non-mapping `value` at the `keys` path."""
+        # Writes go through dict.__setitem__ and dict.setdefault as `config`
+        # starts as `self` and plain assignment would re-enter the
+        # templating __setitem__.
+        config = self
+        for key in keys[:-1]:
+            config = dict.setdefault(config, key, {})
+        key = keys[-1]
+
+        if utils.is_nonstring_sequence(value):
+            if key not in config:
+                dict.__setitem__(config, key, [])
+            values = config[key]
+            seen = self._seen_values(keys, values)
+            for val in value:
+                val = self._get_transform(val)
+                try:
+                    duplicate = val in seen
+                except TypeError:
+                    # Unhashable elements fall back to the list scan.
+                    duplicate = val in values
+                if not duplicate:
+                    values.append(val)
+                    try:
+                        seen.add(val)
+                    except TypeError:
+                        pass
+        else:
+            value = self._get_transform(value)
+            if isinstance(value, MultipleValues):
+                # Own the wrapper before storing or chaining it: a later
+                # conflict mutates its value list in-place.
+                value = value._copy()
+            if key in config and config[key] != value:
+                dict.__setitem__(config, key, MultipleValues(value, config[key]))
+            elif key not in config:
+                dict.__setitem__(config, key, value)
+
+    def update(self, other=(), **kwargs):
+        """Assign every item of `other` and `kwargs` through templating.
+
+        dict.update writes past `__setitem__`, which would store raw
+        values; this override keeps the templating-on-assignment contract.
+        """
+        items = other.items() if utils._is_dict(other) else other
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    @staticmethod
+    def _copy_value(value):
+        """Copy container values so a merge result shares no mutable state."""
+        if utils._is_dict(value):
+            return {
+                key: TemplateDict._copy_value(val)
+                for key, val in value.items()
+            }
+        if utils._is_list(value):
+            return [TemplateDict._copy_value(val) for val in value]
+        if isinstance(value, MultipleValues):
+            return value._copy()
+        return value
+
+    def __or__(self, other):
+        result = TemplateDict(
+            {key: self._copy_value(value) for key, value in self.items()}
+        )
+        result |= other
+        return result
+
+
+class TemplateVisitor:
+    """Visit a template tree and render its callables against an environment."""
+
+    def __init__(self, environment):
+        """Bind the visitor to `environment`."""
+        self.environment = environment
+        # Exact-type dispatch for the common container types; anything else
+        # falls back to the callable and ABC checks in __call__.
+        self._dispatch = {
+            dict: self._visit_mapping,
+            TemplateDict: self._visit_mapping,
+            list: self._visit_sequence,
+        }
+
+    def _visit_mapping(self, mapping):
+        """Visit a nested mapping, telling if it ended up empty."""
+        self(mapping)
+        return not mapping
+
+    def _visit_sequence(self, sequence):
+        """Render the callables of a sequence, telling if it is empty."""
+        for index, element in enumerate(sequence):
+            if callable(element):
+                sequence[index] = element(self.environment)
+        return not sequence
+
+    def __call__(self, template):
+        """Render `template` in-place, pruning empty sections."""
+        to_delete = []
+        dispatch = self._dispatch
+        # TemplateDict.__setitem__ re-templates assigned values, so rendered
+        # values are written back through dict.__setitem__, like
+        # TemplateDict._set_leaf does for its own writes.
+        setitem = (
+            dict.__setitem__
+            if isinstance(template, TemplateDict)
+            else type(template).__setitem__
+        )
+        for key, value in template.items():
+            logger.debug("Visit %s to process environment variables.", key)
+            handler = dispatch.get(type(value))
+            if handler is None:
+                if callable(value):
+                    value = value(self.environment)
+                    setitem(template, key, value)
+                    if value is None:
+                        to_delete.append(key)
+                    continue
+                if utils._is_mutable_dict(value):
+                    handler = self._visit_mapping
+                elif utils._is_list(value):
+                    handler = self._visit_sequence
+                elif value is None:
+                    to_delete.append(key)
+                    continue
+                else:
+                    continue
+            if handler(value):
+                to_delete.append(key)
+
+        for key in to_delete:
+            del template[key]
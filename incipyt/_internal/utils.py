@@ -0,0 +1,88 @@
+"""Small helpers shared across incipyt internals.
+
+The template machinery (`Requires`, `MultipleValues`, `TemplateDict`)
+lives canonically in :mod:`incipyt._internal.templates`; only generic
+helpers with no template knowledge belong here.
+"""
+
+import collections.abc
+import operator
+
+
+class EnvValue:
+    """Value pushed to an :class:`incipyt.system.Environment`.
+
+    Carries the actual `value` along with two flags: `confirmed` marks the
+    value as already validated by the user, `update` allows overwriting a
+    value previously set for the same key.
+    """
+
+    def __init__(self, value, confirmed=False, update=False):
+        """Box `value` with its `confirmed` and `update` flags."""
+        self.value = value
+        self.confirmed = confirmed
+        self.update = update
+
+    def __eq__(self, other):
+        return attrs_eq(self, other, "value", "confirmed", "update")
+
+    def __repr__(self):
+        return make_repr(self, "value", "confirmed", "update")
+
+
+def _is_dict(value):
+    """Check if `value` is a mapping, with a fast path for plain dicts.
+
+    ABC `isinstance` checks go through `__instancecheck__` and are an order
+    of magnitude slower than an exact type check, so the common case is
+    tested first.
+    """
+    return type(value) is dict or isinstance(value, collections.abc.Mapping)
+
+
+def _is_mutable_dict(value):
+    """Check if `value` is a mutable mapping, with a fast path for dicts."""
+    return type(value) is dict or isinstance(
+        value, collections.abc.MutableMapping
+    )
+
+
+def _is_list(value):
+    """Check if `value` is a mutable sequence, with a fast path for lists."""
+    return type(value) is list or isinstance(
+        value, collections.abc.MutableSequence
+    )
+
+
+def is_nonstring_sequence(obj):
+    """Check if `obj` is a sequence but not a string-like object."""
+    obj_type = type(obj)
+    if obj_type is list or obj_type is tuple:
+        return True
+    if obj_type is str or obj_type is bytes or obj_type is bytearray:
+        return False
+    return isinstance(obj, collections.abc.Sequence) and not isinstance(
+        obj, (str, bytes, bytearray)
+    )
+
+
+def make_repr(obj, *attrs):
+    """Build a `repr` string for `obj` from the given attribute names."""
+    values = operator.attrgetter(*attrs)(obj)
+    if len(attrs) == 1:
+        values = (values,)
+    params = ", ".join(
+        f"{attr}={value!r}" for attr, value in zip(attrs, values)
+    )
+    return f"{type(obj).__name__}({params})"
+
+
+def attrs_eq(a, b, *attrs):
+    """Compare `a` and `b` on the given attribute names."""
+    if a is b:
+        return True
+    getter = operator.attrgetter(*attrs)
+    try:
+        return getter(a) == getter(b)
+    except AttributeError:
+        return False
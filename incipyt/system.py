@@ -0,0 +1,61 @@
+"""Environment of variables used for template substitutions."""
+
+import logging
+
+import click
+
+from incipyt._internal import utils
+
+logger = logging.getLogger(__name__)
+
+
+class Environment:
+    """Mapping of variables used to render templates.
+
+    Pulling a missing or unconfirmed variable asks the user for its value,
+    so any template field can be resolved on first use.
+    """
+
+    def __init__(self, auto_confirm=False):
+        """Create an empty environment.
+
+        :param auto_confirm: Never ask confirmation for variables that
+            already have a value.
+        """
+        self.auto_confirm = auto_confirm
+        self.data = {}
+        self._confirmed = set()
+
+    def __getitem__(self, key):
+        if key not in self.data:
+            self.data[key] = click.prompt(key, type=str)
+            self._confirmed.add(key)
+        elif not self.auto_confirm and key not in self._confirmed:
+            self.data[key] = click.prompt(key, default=self.data[key], type=str)
+            self._confirmed.add(key)
+        return self.data[key]
+
+    def __setitem__(self, key, env_value):
+        if not isinstance(env_value, utils.EnvValue):
+            raise TypeError(f"{env_value} should be an EnvValue instance.")
+
+        if key in self.data and not env_value.update:
+            logger.debug("Ignore update for existing environment key %s.", key)
+            return
+
+        if env_value.confirmed:
+            self._confirmed.add(key)
+        self.data[key] = env_value.value
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        """Peek at the value for `key` without prompting the user."""
+        return self.data.get(key, default)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
@@ -0,0 +1,170 @@
+from incipyt._internal import templates, utils
+from incipyt.system import Environment
+
+
+def make_environment(**values):
+    environment = Environment(auto_confirm=True)
+    for key, value in values.items():
+        environment[key] = utils.EnvValue(value, confirmed=True)
+    return environment
+
+
+def test_requires_render():
+    environment = make_environment(NAME="incipyt")
+    assert templates.Requires("{NAME}-cli")(environment) == "incipyt-cli"
+
+
+def test_requires_kwargs_default():
+    environment = make_environment()
+    assert templates.Requires("{AUTHOR}", AUTHOR="Jane")(environment) == "Jane"
+
+
+def test_requires_sanitizer():
+    environment = make_environment(NAME="My Project")
+    requires = templates.Requires(
+        "{NAME}", sanitizer=lambda _, value: value.lower()
+    )
+    assert requires(environment) == "my project"
+
+
+def test_requires_escaped_braces():
+    environment = make_environment()
+    assert templates.Requires("{{{NAME}}}", NAME="x")(environment) == "{x}"
+
+
+def test_requires_single_field_formats_value():
+    environment = make_environment()
+    assert templates.Requires("{NUM}", NUM=42)(environment) == "42"
+
+
+def test_template_dict_wraps_strings():
+    config = templates.TemplateDict({})
+    config["project"] = "{NAME}"
+    assert config["project"] == templates.Requires("{NAME}")
+
+
+def test_template_dict_nested_keys():
+    config = templates.TemplateDict({})
+    config[("tool", "section", "key")] = "{NAME}"
+    assert config["tool"]["section"]["key"] == templates.Requires("{NAME}")
+
+
+def test_template_dict_mapping_value():
+    config = templates.TemplateDict({})
+    config["tool"] = {"section": {"key": "{NAME}"}}
+    assert config["tool"]["section"]["key"] == templates.Requires("{NAME}")
+
+
+def test_template_dict_mapping_value_order():
+    config = templates.TemplateDict({})
+    config["x"] = {"a": {"k": "1"}, "b": {"k": "2"}, "leaf": "3"}
+    assert list(config["x"]) == ["a", "b", "leaf"]
+
+
+def test_template_dict_sequence_dedup():
+    config = templates.TemplateDict({})
+    config["classifiers"] = ["a", "b"]
+    config["classifiers"] = ["b", "c"]
+    assert config["classifiers"] == [
+        templates.Requires("a"),
+        templates.Requires("b"),
+        templates.Requires("c"),
+    ]
+
+
+def test_template_dict_replaced_list_dedup():
+    config = templates.TemplateDict({})
+    config["lst"] = ["one"]
+    del config["lst"]
+    dict.__setitem__(config, "lst", [])
+    config["lst"] = ["two"]
+    config["lst"] = ["one", "two"]
+    assert config["lst"] == [
+        templates.Requires("two"),
+        templates.Requires("one"),
+    ]
+
+
+def test_template_dict_update_templates_values():
+    config = templates.TemplateDict({})
+    config.update({"name": "{NAME}"}, extra="{NAME}")
+    assert config["name"] == templates.Requires("{NAME}")
+    assert config["extra"] == templates.Requires("{NAME}")
+
+
+def test_template_dict_conflict():
+    config = templates.TemplateDict({})
+    config["key"] = "a"
+    config["key"] = "b"
+    assert config["key"] == templates.MultipleValues(
+        templates.Requires("b"), templates.Requires("a")
+    )
+
+
+def test_or_does_not_mutate_operands():
+    config = templates.TemplateDict({})
+    config["lst"] = ["one"]
+    config[("tool", "key")] = "a"
+    result = config | {"lst": ["two"], "tool": {"key": "b"}}
+    assert config["lst"] == [templates.Requires("one")]
+    assert config["lst"] is not result["lst"]
+    assert config["tool"]["key"] == templates.Requires("a")
+    assert result["lst"] == [templates.Requires("one"), templates.Requires("two")]
+
+
+def test_ior_does_not_mutate_right_operand():
+    left = templates.TemplateDict({})
+    right = templates.TemplateDict({})
+    right["key"] = "x"
+    right["key"] = "y"
+    left |= right
+    left["key"] = "z"
+    assert right["key"] == templates.MultipleValues(
+        templates.Requires("y"), templates.Requires("x")
+    )
+
+
+def test_or_does_not_mutate_multiple_values():
+    config = templates.TemplateDict({})
+    config["key"] = "x"
+    config["key"] = "y"
+    config | {"key": "z"}
+    assert config["key"] == templates.MultipleValues(
+        templates.Requires("y"), templates.Requires("x")
+    )
+
+
+def test_visitor_renders_and_prunes():
+    environment = make_environment(NAME="incipyt")
+    template = {
+        "project": templates.Requires("{NAME}"),
+        "empty": {},
+        "values": [templates.Requires("{NAME}-cli")],
+    }
+    templates.TemplateVisitor(environment)(template)
+    assert template == {"project": "incipyt", "values": ["incipyt-cli"]}
+
+
+def test_visitor_renders_template_dict():
+    environment = make_environment(NAME="incipyt")
+    config = templates.TemplateDict({})
+    config["project"] = "{NAME}"
+    templates.TemplateVisitor(environment)(config)
+    assert config["project"] == "incipyt"
+
+
+def test_visitor_nested_template_dict():
+    environment = make_environment(NAME="incipyt")
+    nested = templates.TemplateDict({})
+    nested["key"] = "{NAME}"
+    template = {"section": nested, "empty": templates.TemplateDict({})}
+    templates.TemplateVisitor(environment)(template)
+    assert template == {"section": {"key": "incipyt"}}
+
+
+def test_is_nonstring_sequence():
+    assert utils.is_nonstring_sequence(["a"])
+    assert utils.is_nonstring_sequence(("a",))
+    assert not utils.is_nonstring_sequence("a")
+    assert not utils.is_nonstring_sequence(b"a")
+    assert not utils.is_nonstring_sequence({"a": 1})